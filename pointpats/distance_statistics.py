@@ -7,6 +7,10 @@ from .geometry import (
     k_neighbors as _k_neighbors,
     build_best_tree as _build_best_tree,
     prepare_hull as _prepare_hull,
+    tree_data as _tree_data,
+    _match_tree_dtype,
+    bbox as _bbox,
+    distances_within as _distances_within,
     TREE_TYPES,
 )
 from .random import poisson
@@ -28,6 +32,15 @@ __all__ = [
 ]
 
 
+def _diagonal(coordinates):
+    """
+    Length of the diagonal of the bounding box of the coordinates, which
+    bounds the distance between any two of them.
+    """
+    xmin, ymin, xmax, ymax = _bbox(coordinates)
+    return numpy.hypot(xmax - xmin, ymax - ymin)
+
+
 def _prepare(coordinates, support, distances, metric, hull, edge_correction):
     """
     prepare the arguments to convert into a standard format
@@ -54,7 +67,7 @@ def _prepare(coordinates, support, distances, metric, hull, edge_correction):
     # cast to coordinate array
     if isinstance(coordinates, TREE_TYPES):
         tree = coordinates
-        coordinates = tree.data
+        coordinates = _tree_data(tree)
     else:
         coordinates = numpy.asarray(coordinates)
     hull = _prepare_hull(coordinates, hull)
@@ -189,7 +202,7 @@ def f(
         except NameError:
             tree = _build_best_tree(coordinates, metric)
         finally:
-            distances, _ = tree.query(randoms, k=1)
+            distances, _ = tree.query(_match_tree_dtype(tree, randoms), k=1)
             distances = distances.squeeze()
 
     counts, bins = numpy.histogram(distances, bins=support)
@@ -430,6 +443,15 @@ def k(
                 f" matrix matching the number of input points. The shape of the input matrix"
                 f" is {distances.shape}, but required shape is ({upper_tri_n},) or ({n},{n})"
             )
+    elif (
+        (metric == "euclidean")
+        and (coordinates.shape[1] == 2)
+        and (support.max() < _diagonal(coordinates))
+    ):
+        # pairs further apart than the largest support value are never counted,
+        # so only find the distances of the pairs within it. If the support
+        # spans the whole pattern, nearly every pair is within it, and pdist is faster.
+        upper_tri_distances = _distances_within(coordinates, support.max())
     else:
         upper_tri_distances = spatial.distance.pdist(coordinates, metric=metric)
     n_pairs_less_than_d = (upper_tri_distances < support.reshape(-1, 1)).sum(axis=1)
@@ -570,7 +592,9 @@ def _ripley_test(
         random_i = poisson(hull, size=n_observations)
         if calltype in ("F", "J"):
             random_tree = _build_best_tree(random_i, metric)
-            empty_distances, _ = random_tree.query(empty_space_points, k=1)
+            empty_distances, _ = random_tree.query(
+                _match_tree_dtype(random_tree, empty_space_points), k=1
+            )
             if calltype == "F":
                 core_kwargs["distances"] = empty_distances.squeeze()
             else:  # calltype == 'J':
@@ -4,24 +4,66 @@ from functools import singledispatch
 from libpysal.cg import alpha_shape_auto
 from libpysal.cg.kdtree import Arc_KDTree
 import warnings
+import hashlib
+import weakref
+from collections import namedtuple, OrderedDict
 
 # ------------------------------------------------------------#
 # Utilities and dispatching                                   #
 # ------------------------------------------------------------#
 
 TREE_TYPES = (spatial.KDTree, spatial.cKDTree, Arc_KDTree)
+SKLEARN_TREE_TYPES = ()
 try:
     from sklearn.neighbors import KDTree, BallTree
 
     TREE_TYPES = (*TREE_TYPES, KDTree, BallTree)
+    SKLEARN_TREE_TYPES = (KDTree, BallTree)
 except ModuleNotFoundError:
     pass
 
+try:
+    from pykdtree.kdtree import KDTree as _PyKDTree
+
+    TREE_TYPES = (*TREE_TYPES, _PyKDTree)
+    HAS_PYKDTREE = True
+except ModuleNotFoundError:
+    HAS_PYKDTREE = False
+
 HULL_TYPES = (
     numpy.ndarray,
     spatial.qhull.ConvexHull,
 )
 
+# coordinates split into separate x and y arrays. For an (n,2) array these
+# are strided views, which the kernels read directly rather than copying.
+_Coords = namedtuple("_Coords", ("x", "y"))
+
+
+def _as_points(coordinates, dtype=None):
+    """
+    Cast coordinates to an (n,2) array, treating a single (x,y) pair as one
+    point. Anything else that is not two-dimensional points raises an error.
+    """
+    coordinates = numpy.asarray(coordinates, dtype=dtype)
+    if coordinates.size == 0:
+        return coordinates.reshape(0, 2)
+    coordinates = numpy.atleast_2d(coordinates)
+    if (coordinates.ndim != 2) or (coordinates.shape[1] != 2):
+        raise ValueError(
+            f"Coordinates must be of shape (n,2), but have shape {coordinates.shape}"
+        )
+    return coordinates
+
+
+def _as_soa(coordinates):
+    """
+    Split an (n,2) array of coordinates into its x and y columns.
+    These are views into the input, so no copy is made.
+    """
+    coordinates = _as_points(coordinates)
+    return _Coords(coordinates[:, 0], coordinates[:, 1])
+
 ## Define default dispatches and special dispatches without GEOS
 
 ### AREA
@@ -55,7 +97,7 @@ def _(shape: numpy.ndarray):
     """
     assert len(shape) == 4, "shape is not a bounding box!"
     width, height = shape[2] - shape[0], shape[3] - shape[1]
-    return numpy.abs(width * height)
+    return abs(float(width) * float(height))
 
 
 ### bounding box
@@ -66,8 +108,19 @@ def bbox(shape):
     Works for:
         lists of tuples
         scikit memory arrays
+        pandas dataframes
     """
-    return bbox(numpy.asarray(shape))
+    if isinstance(shape, (list, tuple)):
+        coordinates = numpy.asarray(shape, dtype=numpy.float64)
+        if (coordinates.ndim == 2) and (coordinates.shape[1] == 2) and len(coordinates):
+            return _bbox2d(*_as_soa(coordinates), numpy.empty(4))
+        return bbox(coordinates)
+    coordinates = numpy.asarray(shape)
+    if coordinates.dtype == object:
+        raise NotImplementedError(
+            f"Bounding boxes are not implemented for shapes of type {type(shape)}"
+        )
+    return bbox(coordinates)
 
 
 @bbox.register
@@ -78,7 +131,14 @@ def _(shape: numpy.ndarray):
     """
     if (shape.ndim == 1) & (len(shape) == 4):
         return shape
-    return numpy.array([*shape.min(axis=0), *shape.max(axis=0)])
+    if (
+        (shape.ndim == 2)
+        and (shape.shape[1] == 2)
+        and (shape.shape[0] > 0)
+        and (shape.dtype == numpy.float64)
+    ):
+        return _bbox2d(*_as_soa(shape), numpy.empty(4))
+    return numpy.concatenate((shape.min(axis=0), shape.max(axis=0)))
 
 
 @bbox.register
@@ -125,18 +185,336 @@ def _(shape: spatial.Delaunay, x: float, y: float):
     If the returned simplex index is -1, then the point is not
     within a simplex of the triangulation. 
     """
-    return shape.find_simplex((x, y)) > 0
+    return shape.find_simplex((x, y)) >= 0
 
 
 @contains.register
 def _(shape: spatial.qhull.ConvexHull, x: float, y: float):
     """
-    For convex hulls, convert their exterior first into a Delaunay triangulation
-    and then use the delaunay dispatcher.
+    For convex hulls, use the half-space equations from Qhull directly:
+    a point is inside the hull if it is on the inner side of every facet.
+    """
+    return _contains_convex_point(shape.equations, x, y)
+
+
+### vectorized contains
+
+
+@singledispatch
+def contains_vectorized(shape, xy):
+    """
+    Check whether each point in an (N,2) array of coordinates falls within
+    the shape. Shapes without a vectorized implementation fall back to
+    calling contains() on each point in turn.
+    """
+    xy = _as_points(xy)
+    return numpy.fromiter(
+        (contains(shape, x, y) for x, y in xy), dtype=bool, count=xy.shape[0]
+    )
+
+
+@contains_vectorized.register
+def _(shape: numpy.ndarray, xy: numpy.ndarray):
+    """
+    If provided an ndarray, assume it's a bbox
+    and return whether each point falls inside
+    """
+    xmin, ymin, xmax, ymax = shape
+    x, y = _as_soa(xy)
+    return (xmin <= x) & (x <= xmax) & (ymin <= y) & (y <= ymax)
+
+
+@contains_vectorized.register
+def _(shape: spatial.Delaunay, xy: numpy.ndarray):
+    """
+    For points and a delaunay triangulation, find_simplex is already
+    vectorized, so query all of the points at once.
+    """
+    xy = _as_points(xy)
+    return shape.find_simplex(xy) >= 0
+
+
+@contains_vectorized.register
+def _(shape: spatial.qhull.ConvexHull, xy: numpy.ndarray):
+    """
+    For convex hulls, test all of the points against
+    the hull's half-space equations at once.
+    """
+    xy = numpy.asarray(xy, dtype=numpy.float64)
+    return _contains_convex(shape.equations, *_as_soa(xy))
+
+
+# relative tolerance for points on the facets of convex hulls, scaled like
+# the default tolerance of scipy's Delaunay.find_simplex
+_CONVEX_TOLERANCE = 100 * numpy.finfo(numpy.float64).eps
+
+try:
+    from numba import njit, prange
+
+    HAS_NUMBA = True
+
+    @njit(cache=True)
+    def _convex_tolerance(equations):
+        """
+        Distance outside of a convex hull's facets within which points still
+        count as inside, so that rounding does not exclude the hull's own vertices.
+        """
+        scale = 0.0
+        for i in range(equations.shape[0]):
+            scale = max(scale, abs(equations[i, 2]))
+        return _CONVEX_TOLERANCE * scale
+
+    @njit(cache=True)
+    def _inside_facets(equations, x, y, tol):
+        """
+        Check whether a point lies on the inner side of all of the facets,
+        up to tol. This is written so that NaN coordinates are never inside.
+        """
+        for i in range(equations.shape[0]):
+            if not (equations[i, 0] * x + equations[i, 1] * y + equations[i, 2] <= tol):
+                return False
+        return True
+
+    @njit(cache=True)
+    def _contains_convex_point(equations, x, y):
+        """
+        Check whether a point lies on the inner side of all of the
+        facets of a convex hull, given its (n_facets, 3) equations.
+        """
+        return _inside_facets(equations, x, y, _convex_tolerance(equations))
+
+    @njit(parallel=True, cache=True)
+    def _contains_convex(equations, x, y):
+        """
+        Check whether each point in the x and y arrays lies within a convex hull
+        given its (n_facets, 3) equations.
+        """
+        n = x.shape[0]
+        tol = _convex_tolerance(equations)
+        result = numpy.empty(n, dtype=numpy.bool_)
+        for i in prange(n):
+            result[i] = _inside_facets(equations, x[i], y[i], tol)
+        return result
+
+    @njit(cache=True)
+    def _bbox2d(x, y, out):
+        """
+        Compute the bounding box of the points in the x and y arrays in a single
+        pass, writing [xmin, ymin, xmax, ymax] into out. Like numpy's min and
+        max, a NaN in either coordinate makes both of its bounds NaN.
+        """
+        xmin = xmax = x[0]
+        ymin = ymax = y[0]
+        x_nan = y_nan = False
+        for i in range(x.shape[0]):
+            xi = x[i]
+            yi = y[i]
+            xmin = min(xmin, xi)
+            xmax = max(xmax, xi)
+            ymin = min(ymin, yi)
+            ymax = max(ymax, yi)
+            # NaN fails every comparison above, so it must be tracked on its own
+            x_nan |= xi != xi
+            y_nan |= yi != yi
+        if x_nan:
+            xmin = xmax = numpy.nan
+        if y_nan:
+            ymin = ymax = numpy.nan
+        out[0] = xmin
+        out[1] = ymin
+        out[2] = xmax
+        out[3] = ymax
+        return out
+
+    @njit(parallel=True, cache=True)
+    def _range_count_sorted(sorted_x, sorted_y, query_x, query_y, r):
+        """
+        Count the points within distance r of each query point, given the
+        coordinates of the points to count sorted by their x coordinate.
+        Only points in the sorted x-window [x - r, x + r] are visited, and
+        points outside of the query's bounding box are skipped before
+        computing any distances.
+        """
+        n = query_x.shape[0]
+        counts = numpy.zeros(n, dtype=numpy.int64)
+        r2 = r * r
+        for i in prange(n):
+            x = query_x[i]
+            y = query_y[i]
+            start = numpy.searchsorted(sorted_x, x - r, side="left")
+            stop = numpy.searchsorted(sorted_x, x + r, side="right")
+            count = 0
+            for j in range(start, stop):
+                dy = sorted_y[j] - y
+                if abs(dy) > r:
+                    continue
+                dx = sorted_x[j] - x
+                if dx * dx + dy * dy <= r2:
+                    count += 1
+            counts[i] = count
+        return counts
+
+    @njit(parallel=True, cache=True)
+    def _pairs_within_sorted(sorted_x, sorted_y, r):
+        """
+        Find every pair of points i < j within distance r of one another, given
+        coordinates sorted by their x coordinate. The sweep from each point
+        stops as soon as the x gap exceeds r. The pairs are first counted and
+        then written out, so the outputs are allocated exactly once.
+        """
+        n = sorted_x.shape[0]
+        r2 = r * r
+        counts = numpy.zeros(n + 1, dtype=numpy.int64)
+        for i in prange(n):
+            x = sorted_x[i]
+            y = sorted_y[i]
+            count = 0
+            for j in range(i + 1, n):
+                dx = sorted_x[j] - x
+                if dx > r:
+                    break
+                dy = sorted_y[j] - y
+                if dx * dx + dy * dy <= r2:
+                    count += 1
+            counts[i + 1] = count
+        offsets = numpy.cumsum(counts)
+        left = numpy.empty(offsets[n], dtype=numpy.int64)
+        right = numpy.empty(offsets[n], dtype=numpy.int64)
+        for i in prange(n):
+            x = sorted_x[i]
+            y = sorted_y[i]
+            k = offsets[i]
+            for j in range(i + 1, n):
+                dx = sorted_x[j] - x
+                if dx > r:
+                    break
+                dy = sorted_y[j] - y
+                if dx * dx + dy * dy <= r2:
+                    left[k] = i
+                    right[k] = j
+                    k += 1
+        return left, right
+
+    @njit(parallel=True, cache=True)
+    def _distances_within_sorted(sorted_x, sorted_y, r):
+        """
+        Find the distance between every pair of points i < j that are within
+        distance r of one another, given coordinates sorted by their x
+        coordinate. Like _pairs_within_sorted, the pairs are first counted and
+        then written out, but only their distances are kept.
+        """
+        n = sorted_x.shape[0]
+        counts = numpy.zeros(n + 1, dtype=numpy.int64)
+        for i in prange(n):
+            x = sorted_x[i]
+            y = sorted_y[i]
+            count = 0
+            for j in range(i + 1, n):
+                dx = sorted_x[j] - x
+                if dx > r:
+                    break
+                dy = sorted_y[j] - y
+                if numpy.sqrt(dx * dx + dy * dy) <= r:
+                    count += 1
+            counts[i + 1] = count
+        offsets = numpy.cumsum(counts)
+        distances = numpy.empty(offsets[n], dtype=numpy.float64)
+        for i in prange(n):
+            x = sorted_x[i]
+            y = sorted_y[i]
+            k = offsets[i]
+            for j in range(i + 1, n):
+                dx = sorted_x[j] - x
+                if dx > r:
+                    break
+                dy = sorted_y[j] - y
+                d = numpy.sqrt(dx * dx + dy * dy)
+                if d <= r:
+                    distances[k] = d
+                    k += 1
+        return distances
+
+
+except ModuleNotFoundError:
+    HAS_NUMBA = False
+
+    def _convex_tolerance(equations):
+        """
+        Distance outside of a convex hull's facets within which points still
+        count as inside, so that rounding does not exclude the hull's own vertices.
+        """
+        return _CONVEX_TOLERANCE * numpy.abs(equations[:, 2]).max()
+
+    def _contains_convex_point(equations, x, y):
+        """
+        Check whether a point lies on the inner side of all of the
+        facets of a convex hull, given its (n_facets, 3) equations.
+        """
+        return bool(
+            (equations[:, 0] * x + equations[:, 1] * y + equations[:, 2]).max()
+            <= _convex_tolerance(equations)
+        )
+
+    def _contains_convex(equations, x, y):
+        """
+        Check whether each point in the x and y arrays lies within a convex hull
+        given its (n_facets, 3) equations.
+        """
+        facet_x, facet_y, offset = equations.T
+        return (
+            numpy.multiply.outer(x, facet_x) + numpy.multiply.outer(y, facet_y) + offset
+        ).max(axis=1) <= _convex_tolerance(equations)
+
+    def _bbox2d(x, y, out):
+        """
+        Compute the bounding box of the points in the x and y arrays,
+        writing [xmin, ymin, xmax, ymax] into out.
+        """
+        out[0], out[1], out[2], out[3] = x.min(), y.min(), x.max(), y.max()
+        return out
+
+    def _range_count_sorted(sorted_x, sorted_y, query_x, query_y, r):
+        """
+        Count the points within distance r of each query point, given the
+        coordinates of the points to count sorted by their x coordinate.
+        """
+        tree = spatial.cKDTree(numpy.column_stack((sorted_x, sorted_y)))
+        return tree.query_ball_point(
+            numpy.column_stack((query_x, query_y)), r, return_length=True
+        )
+
+    def _pairs_within_sorted(sorted_x, sorted_y, r):
+        """
+        Find every pair of points i < j within distance r of one another, given
+        coordinates sorted by their x coordinate.
+        """
+        tree = spatial.cKDTree(numpy.column_stack((sorted_x, sorted_y)))
+        pairs = tree.query_pairs(r, output_type="ndarray")
+        return pairs[:, 0].astype(numpy.int64), pairs[:, 1].astype(numpy.int64)
+
+    def _distances_within_sorted(sorted_x, sorted_y, r):
+        """
+        Find the distance between every pair of points i < j that are within
+        distance r of one another, given coordinates sorted by their x coordinate.
+        """
+        tree = spatial.cKDTree(numpy.column_stack((sorted_x, sorted_y)))
+        # pad the search radius so that rounding in the tree never drops a pair
+        i, j = tree.query_pairs(r * (1 + 1e-9), output_type="ndarray").T
+        dx = sorted_x[j] - sorted_x[i]
+        dy = sorted_y[j] - sorted_y[i]
+        distances = numpy.sqrt(dx * dx + dy * dy)
+        return distances[distances <= r]
+
+
+### prepared geometries
+@singledispatch
+def _prepare_geometry(shape):
+    """
+    Prepare a geometry in place so that repeated predicates (like contains)
+    against it can use GEOS's prepared geometry index. Shapes that cannot
+    be prepared in place are returned unchanged.
     """
-    exterior = shape.points[shape.vertices]
-    delaunay = spatial.Delaunay(exterior)
-    return contains(delaunay, x, y)
+    return shape
 
 
 ### centroid
@@ -153,16 +531,14 @@ def _(shape: numpy.ndarray):
     """
     Handle point arrays or bounding boxes
     """
-    from .centrography import mean_center
-
     if shape.ndim == 2:
+        from .centrography import mean_center
+
         return mean_center(shape).squeeze()
     elif shape.ndim == 1:
         assert shape.shape == (4,)
         xmin, ymin, xmax, ymax = shape
-        return numpy.column_stack(
-            (numpy.mean((xmin, xmax)), numpy.mean((ymin, ymax)))
-        ).squeeze()
+        return numpy.array(((xmin + xmax) * 0.5, (ymin + ymax) * 0.5))
     else:
         raise TypeError(
             f"Centroids are only implemented in 2 dimensions,"
@@ -197,6 +573,39 @@ try:
         """
         return shape.contains(_ShapelyPoint((x, y)))
 
+    try:
+        from shapely import contains_xy as _contains_xy
+    except ImportError:  # shapely < 2.0
+        from shapely.vectorized import contains as _contains_xy
+
+    @contains_vectorized.register
+    def _(shape: _BaseGeometry, xy: numpy.ndarray):
+        """
+        If we know we're working with a shapely polygon, then screen the
+        coordinates against its bounding box and test the remaining
+        coordinates in a single call into GEOS
+        """
+        xy = _as_points(xy)
+        result = contains_vectorized(bbox(shape), xy)
+        candidates = xy[result]
+        result[result] = _contains_xy(shape, candidates[:, 0], candidates[:, 1])
+        return result
+
+    try:
+        from shapely import prepare as _shapely_prepare
+
+        @_prepare_geometry.register
+        def _(shape: _BaseGeometry):
+            """
+            Shapely 2.0 geometries can be prepared in place. This is a no-op
+            if the geometry has already been prepared.
+            """
+            _shapely_prepare(shape)
+            return shape
+
+    except ImportError:  # shapely < 2.0 only prepares into a new, different type
+        pass
+
     @bbox.register
     def _(shape: _BaseGeometry):
         """
@@ -235,9 +644,33 @@ try:
     def _(shape: pygeos.Geometry, x: float, y: float):
         """
         If we know we're working with a pygeos polygon, 
-        then use pygeos.within casting the points to a pygeos object too
+        then use pygeos.contains casting the points to a pygeos object too
         """
-        return pygeos.within(pygeos.points((x, y)), shape)
+        return pygeos.contains(shape, pygeos.points((x, y)))
+
+    @contains_vectorized.register
+    def _(shape: pygeos.Geometry, xy: numpy.ndarray):
+        """
+        If we know we're working with a pygeos polygon, then screen the
+        coordinates against its bounding box, build the remaining points
+        all at once, and use pygeos.contains
+        """
+        xy = _as_points(xy)
+        result = contains_vectorized(bbox(shape), xy)
+        candidates = xy[result]
+        result[result] = pygeos.contains(
+            shape, pygeos.points(candidates[:, 0], candidates[:, 1])
+        )
+        return result
+
+    @_prepare_geometry.register
+    def _(shape: pygeos.Geometry):
+        """
+        Prepare pygeos geometries in place. This is a no-op if the
+        geometry has already been prepared.
+        """
+        pygeos.prepare(shape)
+        return shape
 
     @bbox.register
     def _(shape: pygeos.Geometry):
@@ -259,18 +692,145 @@ try:
 except ModuleNotFoundError:
     HAS_PYGEOS = False
 
+
+### fast scalar contains
+# singledispatch walks the type's MRO on every call. For loops that
+# call contains many times, look the implementation up by exact type instead.
+_CONTAINS_TABLE = {
+    hull_type: contains.dispatch(hull_type)
+    for hull_type in (spatial.Delaunay, *HULL_TYPES)
+}
+
+
+def contains_fast(shape, x, y):
+    """
+    Check whether a point falls within a shape, like contains(), but
+    find the implementation in a table keyed on the exact type of the shape.
+    Types not already in the table are resolved once with contains.dispatch.
+    """
+    try:
+        implementation = _CONTAINS_TABLE[type(shape)]
+    except KeyError:
+        implementation = _CONTAINS_TABLE[type(shape)] = contains.dispatch(type(shape))
+    return implementation(shape, x, y)
+
+
 # ------------------------------------------------------------#
 # Constructors for trees, prepared inputs, & neighbors        #
 # ------------------------------------------------------------#
 
 
-def build_best_tree(coordinates, metric):
+def _spread_bits(cells):
+    """
+    Interleave zeros between the lower 16 bits of each integer,
+    so that bit i of the input moves to bit 2i of the output.
+    """
+    cells = cells.astype(numpy.uint32) & 0x0000FFFF
+    cells = (cells | (cells << 8)) & 0x00FF00FF
+    cells = (cells | (cells << 4)) & 0x0F0F0F0F
+    cells = (cells | (cells << 2)) & 0x33333333
+    cells = (cells | (cells << 1)) & 0x55555555
+    return cells
+
+
+def morton_order(coordinates):
+    """
+    Compute the order that sorts planar coordinates along a Morton (Z-order) curve.
+
+    Parameters
+    ----------
+    coordinates : numpy.ndarray of shape (n,2)
+        points to sort
+
+    Returns
+    -------
+    numpy.ndarray of shape (n,) containing the indices that sort the coordinates.
+    """
+    coordinates = numpy.asarray(coordinates, dtype=numpy.float64)
+    lower = coordinates.min(axis=0)
+    extent = coordinates.max(axis=0) - lower
+    extent[extent == 0] = 1
+    cells = ((coordinates - lower) / extent * 0xFFFF).astype(numpy.uint32)
+    codes = _spread_bits(cells[:, 0]) | (_spread_bits(cells[:, 1]) << 1)
+    return numpy.argsort(codes, kind="stable")
+
+
+# tree methods that return indices, which SpatiallySortedTree does not remap
+_UNMAPPED_QUERIES = (
+    "query_radius",
+    "query_ball_point",
+    "query_ball_tree",
+    "query_pairs",
+    "sparse_distance_matrix",
+)
+
+
+class SpatiallySortedTree:
+    """
+    A distance tree built over coordinates that have been sorted along a
+    Morton curve, so that points which are close in space are also close in
+    memory. Results of query() are mapped back to the original order of the
+    coordinates. Other methods that return indices, like query_radius, are not
+    available, and all other attributes are looked up on the wrapped tree.
+
+    Parameters
+    ----------
+    coordinates : numpy.ndarray of shape (n,2)
+        coordinates over which to build the tree.
+    tree : callable
+        function that builds a distance tree from an array of coordinates,
+        like scipy.spatial.cKDTree or sklearn.neighbors.KDTree
+
+    Attributes
+    ----------
+    data : numpy.ndarray of shape (n,2)
+        coordinates in their original order
+    tree : distance tree
+        the tree built over the sorted coordinates
+    order : numpy.ndarray of shape (n,)
+        the position of each sorted coordinate in the original coordinates
+    """
+
+    def __init__(self, coordinates, tree):
+        self.data = numpy.asarray(coordinates)
+        self.order = morton_order(self.data)
+        self.tree = tree(numpy.ascontiguousarray(self.data[self.order]))
+        # trees report missing neighbors with an index of n, so keep that sentinel
+        self._index_map = numpy.append(self.order, self.order.shape[0])
+
+    def query(self, X, *args, **kwargs):
+        """
+        Query the wrapped tree, returning indices into the original coordinates.
+        """
+        result = self.tree.query(_match_tree_dtype(self.tree, X), *args, **kwargs)
+        if isinstance(result, tuple):
+            distances, indices = result
+            return distances, self._index_map[indices]
+        return self._index_map[result]
+
+    def __getattr__(self, name):
+        if name == "tree":
+            raise AttributeError(name)
+        if name in _UNMAPPED_QUERIES:
+            raise AttributeError(
+                f"{name} would return indices into the spatially sorted coordinates."
+                f" Call it on the wrapped .tree and map the indices through .order"
+            )
+        return getattr(self.tree, name)
+
+
+TREE_TYPES = (*TREE_TYPES, SpatiallySortedTree)
+
+
+def build_best_tree(coordinates, metric, spatial_sort=False, dtype=None):
     """
     Build the best query tree that can support the application.
     Chooses from:
-    1. sklearn.KDTree if available and metric is simple
-    2. sklearn.BallTree if available and metric is complicated
-    3. scipy.spatial.cKDTree if nothing else
+    1. pykdtree.KDTree if available and the coordinates are 2-dimensional
+       floats with a euclidean metric
+    2. sklearn.KDTree if available and metric is simple
+    3. sklearn.BallTree if available and metric is complicated
+    4. scipy.spatial.cKDTree if nothing else
 
     Parameters
     ----------
@@ -279,6 +839,20 @@ def build_best_tree(coordinates, metric):
     metric : string or callable
         either a metric supported by sklearn KDTrees or BallTrees, or a callabe function.
         If sklearn is not installed, then this must be euclidean. 
+    spatial_sort : bool
+        whether to build the tree over the coordinates sorted along a Morton
+        curve, so that points that are close in space are also close in memory.
+        This doubles the cost of building the tree, but speeds up repeated
+        queries against it, so it is only worthwhile for trees that are
+        queried many times. Query results always refer to the original order
+        of the coordinates. 
+    dtype : numpy.dtype
+        the floating point precision to build the tree with. By default, this is
+        float64, whatever the precision of the input coordinates. Asking for
+        numpy.float32 halves the memory used by the tree and speeds up queries
+        when the tree is from pykdtree, at the cost of precision: float32 only resolves about seven
+        significant digits, so large projected coordinates (like UTM northings)
+        should stay in float64. Other tree libraries always work in float64. 
 
     Returns
     -------
@@ -287,7 +861,9 @@ def build_best_tree(coordinates, metric):
 
     Notes
     -----
-        This will return a scikit-learn KDTree if the metric is supported and 
+        For euclidean distances on planar float coordinates, this will return
+        a pykdtree KDTree if pykdtree can be imported. 
+        Otherwise, this will return a scikit-learn KDTree if the metric is supported and 
         sklearn can be imported. 
         If the metric is not supported by KDTree, a BallTree will be used if
         sklearn can be imported. 
@@ -296,40 +872,57 @@ def build_best_tree(coordinates, metric):
         If sklearn can't be imported, then a scipy.spatial.KDTree will be used
         if the metric is euclidean. 
         Otherwise, an error will be raised. 
+        KDTrees use a leaf size of 32, which is faster than the libraries' 
+        defaults for planar point patterns. 
     """
-    coordinates = numpy.asarray(coordinates)
-    tree = spatial.cKDTree
-    try:
-        from sklearn.neighbors import KDTree, BallTree
-
-        if metric in KDTree.valid_metrics:
-            tree = lambda coordinates: KDTree(coordinates, metric=metric)
-        elif metric in BallTree.valid_metrics:
-            tree = lambda coordinates: BallTree(coordinates, metric=metric)
-        elif callable(metric):
-            warnings.warn(
-                "Distance metrics defined in pure Python may "
-                " have unacceptable performance!",
-                stacklevel=2,
-            )
-            tree = lambda coordinates: BallTree(coordinates, metric=metric)
-        else:
-            raise KeyError(
-                f"Metric {metric} not found in set of available types."
-                f"BallTree metrics: {BallTree.valid_metrics}, and"
-                f"scikit KDTree metrics: {KDTree.valid_metrics}."
-            )
-    except ModuleNotFoundError as e:
-        if metric not in ("l2", "euclidean"):
-            raise KeyError(
-                f"Metric {metric} requested, but this requires"
-                f" scikit-learn to use. Without scikit-learn, only"
-                f" euclidean distance metric is supported."
-            )
+    if dtype is None:
+        dtype = numpy.float64
+    coordinates = numpy.asarray(coordinates, dtype=dtype)
+    if (
+        HAS_PYKDTREE
+        and (metric in ("l2", "euclidean"))
+        and (coordinates.ndim == 2)
+        and (coordinates.shape[1] == 2)
+        and (coordinates.dtype in (numpy.float32, numpy.float64))
+    ):
+        tree = lambda coordinates: _PyKDTree(coordinates, leafsize=32)
+    else:
+        tree = lambda coordinates: spatial.cKDTree(coordinates, leafsize=32)
+        try:
+            from sklearn.neighbors import KDTree, BallTree
+
+            if metric in KDTree.valid_metrics:
+                tree = lambda coordinates: KDTree(
+                    coordinates, metric=metric, leaf_size=32
+                )
+            elif metric in BallTree.valid_metrics:
+                tree = lambda coordinates: BallTree(coordinates, metric=metric)
+            elif callable(metric):
+                warnings.warn(
+                    "Distance metrics defined in pure Python may "
+                    " have unacceptable performance!",
+                    stacklevel=2,
+                )
+                tree = lambda coordinates: BallTree(coordinates, metric=metric)
+            else:
+                raise KeyError(
+                    f"Metric {metric} not found in set of available types."
+                    f"BallTree metrics: {BallTree.valid_metrics}, and"
+                    f"scikit KDTree metrics: {KDTree.valid_metrics}."
+                )
+        except ModuleNotFoundError as e:
+            if metric not in ("l2", "euclidean"):
+                raise KeyError(
+                    f"Metric {metric} requested, but this requires"
+                    f" scikit-learn to use. Without scikit-learn, only"
+                    f" euclidean distance metric is supported."
+                )
+    if spatial_sort and (coordinates.ndim == 2) and (coordinates.shape[1] == 2):
+        return SpatiallySortedTree(coordinates, tree)
     return tree(coordinates)
 
 
-def k_neighbors(tree, coordinates, k, **kwargs):
+def k_neighbors(tree, coordinates, k, out=None, **kwargs):
     """
     Query a kdtree for k neighbors, handling the self-neighbor case
     in the case of coincident points. 
@@ -343,6 +936,9 @@ def k_neighbors(tree, coordinates, k, **kwargs):
         coordinates to query for their neighbors within the tree. 
     k : int
         number of neighbors to query in the tree
+    out : tuple of numpy.ndarray
+        optional (distances, indices) arrays of shape (n,k) to write the result into,
+        so that repeated queries can re-use the same memory.
     **kwargs : mappable
         arguments that may need to be passed down to the tree.query() function
 
@@ -351,19 +947,241 @@ def k_neighbors(tree, coordinates, k, **kwargs):
     a tuple of (distances, indices) that is assured to not include the point itself
     in its query result. 
     """
+    base_tree = tree.tree if isinstance(tree, SpatiallySortedTree) else tree
+    coordinates = _match_tree_dtype(base_tree, coordinates)
     distances, indices = tree.query(coordinates, k=k + 1, **kwargs)
     n, ks = distances.shape
     assert ks == k + 1
     full_indices = numpy.arange(n)
-    other_index_mask = indices != full_indices.reshape(n, 1)
-    has_k_indices = other_index_mask.sum(axis=1) == (k + 1)
-    other_index_mask[has_k_indices, -1] = False
-    distances = distances[other_index_mask].reshape(n, k)
-    indices = indices[other_index_mask].reshape(n, k)
-    return distances, indices
+    # find the column holding each point's self-neighbor. If a point was not
+    # returned as its own neighbor (e.g. when points are coincident), then
+    # drop its furthest neighbor instead.
+    is_self = indices == full_indices.reshape(n, 1)
+    self_column = is_self.argmax(axis=1)
+    self_column[~is_self[full_indices, self_column]] = k
+    # skip over the self column and gather the rest in a single pass
+    columns = numpy.arange(k)
+    columns = columns + (columns >= self_column.reshape(n, 1))
+    columns += full_indices.reshape(n, 1) * (k + 1)
+    if out is None:
+        return distances.take(columns), indices.take(columns)
+    out_distances, out_indices = out
+    distances.take(columns, out=out_distances)
+    indices.take(columns, out=out_indices)
+    return out_distances, out_indices
+
+
+def range_count(tree, coordinates, r):
+    """
+    Count the number of points in a tree that are within a given distance
+    of each query point. Unlike querying for the neighbors themselves, this
+    does not build a list of neighbor indices for every point.
+
+    Arguments
+    ----------
+    tree : distance tree
+        a distance tree, such as a scipy KDTree or sklearn KDTree or BallTree
+        built using build_best_tree.
+    coordinates : numpy.ndarray of shape n,2
+        coordinates to count neighbors around.
+    r : float
+        the distance within which points are counted. Points exactly
+        at this distance are included. For a libpysal Arc_KDTree, this is
+        an arc distance in the units of the tree's radius, and coordinates
+        are (longitude, latitude) pairs.
+
+    Returns
+    --------
+    numpy.ndarray of shape (n,) containing the number of points in the tree
+    within distance r of each point in coordinates. If a query point
+    is in the tree, it counts itself.
+
+    Notes
+    -----
+    Trees without a radius query, like pykdtree's KDTree, are counted by
+    sweeping over the tree's points sorted by x. The sorted points are
+    kept for as long as the tree is alive, so later calls do not sort again.
+    """
+    if isinstance(tree, SpatiallySortedTree):
+        tree = tree.tree
+    coordinates = numpy.atleast_2d(numpy.asarray(coordinates, dtype=numpy.float64))
+    if isinstance(tree, SKLEARN_TREE_TYPES):
+        return tree.query_radius(coordinates, r=r, count_only=True)
+    if isinstance(tree, Arc_KDTree):  # no return_length, so count the neighbors
+        neighbors = tree.query_ball_point(coordinates, r)
+        return numpy.fromiter(
+            map(len, neighbors), dtype=numpy.int64, count=len(neighbors)
+        )
+    if isinstance(tree, (spatial.KDTree, spatial.cKDTree)):
+        return numpy.asarray(
+            tree.query_ball_point(coordinates, r, return_length=True)
+        )
+    sorted_x, sorted_y = _sorted_by_x(tree)
+    return _range_count_sorted(sorted_x, sorted_y, *_as_soa(coordinates), float(r))
+
+
+# x-sorted coordinates of trees, keyed on the id of the array holding the
+# tree's points, alongside a weak reference to that array
+_X_SORTED = {}
 
 
-def prepare_hull(coordinates, hull=None):
+def _sorted_by_x(tree):
+    """
+    Get contiguous float64 copies of the x and y coordinates of the points
+    in a tree, sorted by their x coordinate. The result is cached until the
+    array holding the tree's points is garbage collected, so the cache never
+    keeps a tree or its points alive.
+    """
+    key = id(tree.data)
+    cached = _X_SORTED.get(key)
+    if (cached is not None) and (cached[0]() is tree.data):
+        return cached[1]
+    data = tree_data(tree)
+    order = numpy.argsort(data[:, 0], kind="stable")
+    result = _Coords(
+        numpy.ascontiguousarray(data[order, 0], dtype=numpy.float64),
+        numpy.ascontiguousarray(data[order, 1], dtype=numpy.float64),
+    )
+    try:
+        ref = weakref.ref(tree.data, lambda ref: _forget_sorted(key, ref))
+    except TypeError:  # the points can't be weakly referenced, so don't cache
+        return result
+    _X_SORTED[key] = (ref, result)
+    return result
+
+
+def _forget_sorted(key, ref):
+    """
+    Drop the cached x-sorted coordinates for an array that has been collected.
+    """
+    cached = _X_SORTED.get(key)
+    if (cached is not None) and (cached[0] is ref):
+        del _X_SORTED[key]
+
+
+def pairs_within(coordinates, r):
+    """
+    Find all pairs of points that are within a given distance of one another.
+    The points are swept in order of their x coordinate, so only pairs whose
+    x coordinates are within r of one another are ever compared, and no
+    distance tree or n by n distance matrix is built.
+
+    Arguments
+    ----------
+    coordinates : numpy.ndarray of shape n,2
+        coordinates of the points to pair up.
+    r : float
+        the distance within which points are paired. Points exactly
+        at this distance are included.
+
+    Returns
+    --------
+    a tuple (i, j) of integer numpy.ndarrays of the same length, where
+    i[k] < j[k] are the indices in coordinates of the k-th pair. Each pair
+    is reported once, and no point is paired with itself.
+    """
+    coordinates = _as_points(coordinates, dtype=numpy.float64)
+    order = numpy.argsort(coordinates[:, 0], kind="stable")
+    sorted_x = numpy.ascontiguousarray(coordinates[order, 0])
+    sorted_y = numpy.ascontiguousarray(coordinates[order, 1])
+    left, right = _pairs_within_sorted(sorted_x, sorted_y, float(r))
+    left, right = order[left], order[right]
+    return numpy.minimum(left, right), numpy.maximum(left, right)
+
+
+def distances_within(coordinates, r):
+    """
+    Find the distances between all pairs of points that are within a given
+    distance of one another. Like pairs_within, only points whose x coordinates
+    are within r of one another are compared, but only the distances are
+    kept, so this uses as much memory per pair as scipy's pdist.
+
+    Arguments
+    ----------
+    coordinates : numpy.ndarray of shape n,2
+        coordinates of the points to pair up.
+    r : float
+        the distance within which points are paired. Points exactly
+        at this distance are included.
+
+    Returns
+    --------
+    numpy.ndarray containing the euclidean distance of each pair of distinct
+    points that are within distance r of one another, in no particular order.
+    Each pair is reported once.
+    """
+    coordinates = _as_points(coordinates, dtype=numpy.float64)
+    order = numpy.argsort(coordinates[:, 0], kind="stable")
+    sorted_x = numpy.ascontiguousarray(coordinates[order, 0])
+    sorted_y = numpy.ascontiguousarray(coordinates[order, 1])
+    return _distances_within_sorted(sorted_x, sorted_y, float(r))
+
+
+def _match_tree_dtype(tree, coordinates):
+    """
+    pykdtree requires query points to have the same precision as the
+    points in the tree, so cast them if needed. Other trees are left alone.
+    """
+    if HAS_PYKDTREE and isinstance(tree, _PyKDTree):
+        return numpy.asarray(coordinates, dtype=tree.data.dtype)
+    return coordinates
+
+
+def tree_data(tree):
+    """
+    Get the (n,2) array of coordinates used to build a distance tree.
+    pykdtree stores its points as a flat array, so reshape them back
+    into one row per point.
+    """
+    data = numpy.asarray(tree.data)
+    if HAS_PYKDTREE and isinstance(tree, _PyKDTree):
+        data = data.reshape(tree.n, tree.ndim)
+    return data
+
+
+def _content_digest(coordinates):
+    """
+    Hash the shape, dtype, and contents of an array, so that
+    arrays with identical contents have the same digest.
+    """
+    coordinates = numpy.ascontiguousarray(coordinates)
+    digest = hashlib.sha256(coordinates.tobytes())
+    digest.update(f"{coordinates.shape}{coordinates.dtype.str}".encode())
+    return digest.digest()
+
+
+def _build_hull(coordinates, kind):
+    """
+    Build a convex hull or (prepared) alpha shape for the coordinates.
+    """
+    if kind == "convex":
+        return spatial.ConvexHull(coordinates)
+    return _prepare_geometry(alpha_shape_auto(coordinates))
+
+
+# the most recently used hulls, keyed on the digest of their coordinates
+_HULL_CACHE = OrderedDict()
+_HULL_CACHE_SIZE = 8
+
+
+def _cached_hull(coordinates, kind):
+    """
+    Build a convex hull or alpha shape for the coordinates, re-using the
+    result for coordinates with identical contents. Only the digest of the
+    coordinates is kept as the key, and hulls are built from a copy, so the
+    cache never keeps the caller's array alive.
+    """
+    key = (_content_digest(coordinates), kind)
+    hull = _HULL_CACHE.pop(key, None)
+    if hull is None:
+        hull = _build_hull(numpy.array(coordinates), kind)
+    _HULL_CACHE[key] = hull
+    while len(_HULL_CACHE) > _HULL_CACHE_SIZE:
+        _HULL_CACHE.popitem(last=False)
+    return hull
+
+
+def prepare_hull(coordinates, hull=None, cache=True):
     """
     Construct a hull from the coordinates given a hull type
     Will either return:
@@ -378,6 +1196,9 @@ def prepare_hull(coordinates, hull=None):
     hull : string or a pre-computed hull
         A string denoting what kind of hull to compute (if required) or a hull
         that has already been computed
+    cache : bool
+        whether to re-use convex hulls and alpha shapes already built for
+        coordinates with the same contents. 
 
     Returns
     --------
@@ -389,6 +1210,13 @@ def prepare_hull(coordinates, hull=None):
         - a shapely polygon/multipolygon 
         - a pygeos geometry
         - a scipy.spatial.qhull.ConvexHull
+
+    Notes
+    -----
+    Convex hulls and alpha shapes are cached on the contents of the coordinates,
+    so asking for the same hull of the same points again returns the same object.
+    Simulations that draw many patterns within one hull can call this once and
+    pass the result along, rather than rebuilding the hull for each draw. 
     """
     if isinstance(hull, numpy.ndarray):
         assert len(hull) == 4, f"bounding box provided is not shaped correctly! {hull}"
@@ -398,15 +1226,21 @@ def prepare_hull(coordinates, hull=None):
         return bbox(coordinates)
     if HAS_SHAPELY:  # protect the isinstance check if import has failed
         if isinstance(hull, (_ShapelyPolygon, _ShapelyMultiPolygon)):
-            return hull
+            return _prepare_geometry(hull)
     if HAS_PYGEOS:
         if isinstance(hull, pygeos.Geometry):
-            return hull
+            return _prepare_geometry(hull)
     if isinstance(hull, str):
         if hull.startswith("convex"):
-            return spatial.ConvexHull(coordinates)
+            kind = "convex"
         elif hull.startswith("alpha") or hull.startswith("α"):
-            return alpha_shape_auto(coordinates)
+            kind = "alpha"
+        else:
+            kind = None
+        if kind is not None:
+            if cache:
+                return _cached_hull(coordinates, kind)
+            return _build_hull(coordinates, kind)
     elif isinstance(hull, spatial.qhull.ConvexHull):
         return hull
     raise ValueError(
@@ -3,7 +3,7 @@ from .geometry import (
     spatial,
     area as _area,
     centroid as _centroid,
-    contains as _contains,
+    contains_vectorized as _contains_vectorized,
     bbox as _bbox,
     prepare_hull as _prepare_hull,
     HULL_TYPES,
@@ -143,18 +143,19 @@ def poisson(hull, intensity=None, size=None):
     result = numpy.empty((n_simulations, n_observations, 2))
 
     bbox = _bbox(hull)
+    lower, extent = bbox[:2], bbox[2:] - bbox[:2]
 
     for i_replication in range(n_simulations):
-        generating = True
         i_observation = 0
         while i_observation < n_observations:
-            x, y = (
-                numpy.random.uniform(bbox[0], bbox[2]),
-                numpy.random.uniform(bbox[1], bbox[3]),
-            )
-            if _contains(hull, x, y):
-                result[i_replication, i_observation] = (x, y)
-                i_observation += 1
+            # draw only as many candidates as are still needed, so the random
+            # stream is consumed exactly as if drawing one point at a time
+            n_remaining = n_observations - i_observation
+            candidates = lower + extent * numpy.random.random_sample((n_remaining, 2))
+            accepted = candidates[_contains_vectorized(hull, candidates)]
+            n_accepted = accepted.shape[0]
+            result[i_replication, i_observation : i_observation + n_accepted] = accepted
+            i_observation += n_accepted
     return result.squeeze()
 
 
@@ -233,18 +234,21 @@ def normal(hull, center=None, cov=None, size=None):
     bbox = _bbox(hull)
 
     for i_replication in range(n_simulations):
-        generating = True
         i_observation = 0
         replication_cov = cov[i] if cov.ndim == 3 else cov
         replication_sd = numpy.diagonal(replication_cov) ** 0.5
         replication_cor = (1 / replication_sd) * replication_cov * (1 / replication_sd)
 
         while i_observation < n_observations:
-            candidate = numpy.random.multivariate_normal((0, 0), replication_cor)
-            x, y = center + candidate * replication_sd
-            if _contains(hull, x, y):
-                result[i_replication, i_observation] = (x, y)
-                i_observation += 1
+            n_remaining = n_observations - i_observation
+            candidates = numpy.random.multivariate_normal(
+                (0, 0), replication_cor, size=n_remaining
+            )
+            candidates = center + candidates * replication_sd
+            accepted = candidates[_contains_vectorized(hull, candidates)]
+            n_accepted = accepted.shape[0]
+            result[i_replication, i_observation : i_observation + n_accepted] = accepted
+            i_observation += n_accepted
     return result.squeeze()
 
 
@@ -441,11 +445,8 @@ def _uniform_circle(n, radius=1.0, center=(0.0, 0.0), burn=2, verbose=False, hul
         if hull is None:
             in_hull = True
         else:
-            in_hull = numpy.asarray(
-                [
-                    _contains(hull, xi + center_x, yi + center_y)
-                    for xi, yi in numpy.column_stack((x, y))
-                ]
+            in_hull = _contains_vectorized(
+                hull, numpy.column_stack((x + center_x, y + center_y))
             ).reshape(-1, 1)
         ids, *_ = numpy.where(((x * x + y * y) <= r2) & in_hull)
         candidates = numpy.hstack((x, y))[ids]
@@ -1,8 +1,9 @@
 import numpy
 from scipy import spatial
 from pointpats import distance_statistics as ripley, geometry, random
-from libpysal.cg import alpha_shape_auto
+from libpysal.cg import alpha_shape_auto, sphere
 import pygeos
+import pandas
 import warnings
 import pytest
 
@@ -66,11 +67,55 @@ def test_primitives():
     assert not (geometry.contains(pygeos_ashape, *point_out))
     assert not (geometry.contains(bbox, *point_out))
 
+    # the first simplex of a triangulation is inside of it, too
+    delaunay = spatial.Delaunay(points)
+    first_simplex = points[delaunay.simplices[0]].mean(axis=0)
+    assert geometry.contains(delaunay, *first_simplex)
+
+    grid = numpy.mgrid[0.5:110:7, 0.5:110:7].reshape(2, -1).T
+    for shape in (chull, ashape, pygeos_ashape, bbox):
+        numpy.testing.assert_array_equal(
+            geometry.contains_vectorized(shape, [point_in, point_out]), [True, False]
+        )
+    for shape in (chull, ashape, pygeos_ashape, bbox):
+        scalar = [geometry.contains(shape, *xy) for xy in grid]
+        assert scalar == [geometry.contains_fast(shape, *xy) for xy in grid]
+        numpy.testing.assert_array_equal(
+            geometry.contains_vectorized(shape, grid), scalar
+        )
+    # a hull's vertices are inside of it, and missing coordinates never are
+    vertices = chull.points[chull.vertices]
+    assert all(geometry.contains(chull, *xy) for xy in vertices)
+    assert geometry.contains_vectorized(chull, vertices).all()
+    assert not geometry.contains(chull, numpy.nan, point_in[1])
+    assert not geometry.contains_vectorized(chull, [(numpy.nan, point_in[1])]).any()
+    # coordinates that are not (n,2) are rejected rather than re-paired
+    for shape in (chull, ashape, pygeos_ashape, bbox):
+        with pytest.raises(ValueError):
+            geometry.contains_vectorized(shape, numpy.zeros((4, 3)))
+
     numpy.testing.assert_array_equal(bbox, geometry.bbox(bbox))
     numpy.testing.assert_array_equal(bbox, geometry.bbox(ashape))
     numpy.testing.assert_array_equal(bbox, geometry.bbox(pygeos_ashape))
     numpy.testing.assert_array_equal(bbox, geometry.bbox(chull))
     numpy.testing.assert_array_equal(bbox, geometry.bbox(points))
+    numpy.testing.assert_array_equal(bbox, geometry.bbox(points.tolist()))
+    numpy.testing.assert_array_equal(bbox, geometry.bbox(list(bbox)))
+    balltree = ripley._build_best_tree(points, "haversine")
+    numpy.testing.assert_array_equal(bbox, geometry.bbox(balltree.data))
+    numpy.testing.assert_array_equal(bbox, geometry.bbox(pandas.DataFrame(points)))
+    with pytest.raises(NotImplementedError):
+        geometry.bbox(object())
+    # missing coordinates are not silently skipped
+    corrupt = points.copy()
+    corrupt[5, 0] = numpy.nan
+    numpy.testing.assert_array_equal(
+        geometry.bbox(corrupt), (numpy.nan, bbox[1], numpy.nan, bbox[3])
+    )
+
+    numpy.testing.assert_allclose(
+        geometry.centroid(bbox), ((bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2)
+    )
 
 
 def test_tree_functions():
@@ -95,6 +140,129 @@ def test_tree_functions():
     distances, indices = ripley._k_neighbors(mytree, points, k=1)
     assert (indices.squeeze() != numpy.arange(points.shape[0])).all()
 
+    # query arguments, like scikit-learn's dual-tree traversal, are passed
+    # through to the tree and give the same neighbors as querying each point
+    distances, indices = ripley._k_neighbors(balltree, points, k=3)
+    dual_distances, dual_indices = ripley._k_neighbors(
+        balltree, points, k=3, dualtree=True
+    )
+    numpy.testing.assert_allclose(distances, dual_distances)
+    numpy.testing.assert_array_equal(indices, dual_indices)
+
+    # sorting the tree spatially does not change query results
+    assert not isinstance(kdtree, geometry.SpatiallySortedTree)
+    unsorted = kdtree
+    sorted_tree = ripley._build_best_tree(points, "euclidean", spatial_sort=True)
+    assert isinstance(sorted_tree, geometry.SpatiallySortedTree)
+    numpy.testing.assert_array_equal(sorted_tree.data, points)
+    sorted_result = ripley._k_neighbors(sorted_tree, points, k=3)
+    unsorted_result = ripley._k_neighbors(unsorted, points, k=3)
+    numpy.testing.assert_allclose(sorted_result[0], unsorted_result[0])
+    numpy.testing.assert_array_equal(sorted_result[1], unsorted_result[1])
+    # methods whose indices would refer to the sorted coordinates are refused
+    sorted_balltree = ripley._build_best_tree(points, "minkowski", spatial_sort=True)
+    with pytest.raises(AttributeError):
+        sorted_balltree.query_radius(points[:3], r=5)
+    with pytest.raises(AttributeError):
+        sorted_tree.query_ball_point(points[:3], 5)
+    order = geometry.morton_order(points)
+    numpy.testing.assert_array_equal(numpy.sort(order), numpy.arange(len(points)))
+
+    # trees can be built in single precision and queried with double precision
+    single = ripley._build_best_tree(points, "euclidean", dtype=numpy.float32)
+    single_result = ripley._k_neighbors(single, points, k=3)
+    numpy.testing.assert_allclose(single_result[0], unsorted_result[0], rtol=1e-5)
+    numpy.testing.assert_array_equal(single_result[1], unsorted_result[1])
+
+    # coincident points are still neighbors of one another
+    duplicated = numpy.row_stack((points, points[:1]))
+    duplicated_tree = ripley._build_best_tree(duplicated, "euclidean")
+    distances, indices = ripley._k_neighbors(duplicated_tree, duplicated, k=2)
+    assert distances.shape == indices.shape == (duplicated.shape[0], 2)
+    assert (indices != numpy.arange(duplicated.shape[0]).reshape(-1, 1)).all()
+    assert indices[0, 0] == 12 and indices[12, 0] == 0
+    numpy.testing.assert_array_equal(distances[[0, 12], 0], 0)
+
+    # results can be written into pre-allocated arrays
+    out = (numpy.empty_like(distances), numpy.empty_like(indices))
+    result = ripley._k_neighbors(duplicated_tree, duplicated, k=2, out=out)
+    assert result[0] is out[0] and result[1] is out[1]
+    numpy.testing.assert_array_equal(out[0], distances)
+    numpy.testing.assert_array_equal(out[1], indices)
+
+
+def test_range_count():
+    grid = numpy.mgrid[0:100:9, 0:100:9].reshape(2, -1).T
+    D = spatial.distance.cdist(grid, points)
+    for radius in (0, 15, 30.5):
+        expected = (D <= radius).sum(axis=1)
+        for candidate in (
+            tree,
+            ripley._build_best_tree(points, "euclidean"),
+            ripley._build_best_tree(points, "euclidean", spatial_sort=True),
+            ripley._build_best_tree(points, "minkowski"),
+            ripley._build_best_tree(points, "minkowski", spatial_sort=True),
+        ):
+            numpy.testing.assert_array_equal(
+                geometry.range_count(candidate, grid, radius), expected
+            )
+        numpy.testing.assert_array_equal(
+            geometry._range_count_sorted(
+                *points[numpy.argsort(points[:, 0])].T.copy(),
+                *grid.astype(float).T,
+                radius,
+            ),
+            expected,
+        )
+    # arc distance trees count within an arc distance of (longitude, latitude) points
+    lonlat = points - 50
+    arc_tree = geometry.Arc_KDTree(lonlat, radius=1)
+    arc_D = numpy.asarray(
+        [[sphere.arcdist(u, v, radius=1) for v in lonlat] for u in lonlat]
+    )
+    for radius in (0.1, 0.5):
+        numpy.testing.assert_array_equal(
+            geometry.range_count(arc_tree, lonlat, radius),
+            (arc_D <= radius).sum(axis=1),
+        )
+
+
+def test_range_count_sorted_cache():
+    # trees without a radius query, like pykdtree's, keep their x-sorted
+    # points only for as long as the tree is alive
+    pykdtree = pytest.importorskip("pykdtree.kdtree")
+    kdtree = pykdtree.KDTree(points.copy())
+    grid = numpy.mgrid[0:100:9, 0:100:9].reshape(2, -1).T
+    expected = (spatial.distance.cdist(grid, points) <= 15).sum(axis=1)
+    numpy.testing.assert_array_equal(geometry.range_count(kdtree, grid, 15), expected)
+    assert geometry._sorted_by_x(kdtree) is geometry._sorted_by_x(kdtree)
+    n_cached = len(geometry._X_SORTED)
+    del kdtree
+    assert len(geometry._X_SORTED) == n_cached - 1
+
+
+def test_pairs_within():
+    # include duplicated points, which are zero distance apart
+    pattern = numpy.row_stack((points, points[:3]))
+    D = spatial.distance.squareform(spatial.distance.pdist(pattern))
+    for radius in (0, 15, 30.5, 200):
+        i, j = geometry.pairs_within(pattern, radius)
+        assert (i < j).all()
+        found = set(zip(i.tolist(), j.tolist()))
+        assert len(found) == len(i)
+        expected = set(zip(*numpy.nonzero(numpy.triu(D <= radius, k=1))))
+        assert found == expected
+        numpy.testing.assert_array_equal(
+            numpy.sort(geometry.distances_within(pattern, radius)),
+            numpy.sort(D[numpy.triu(D <= radius, k=1)]),
+        )
+    # supports within and beyond the extent of the pattern match pdist exactly
+    for k_support in (support, support * 2):
+        numpy.testing.assert_array_equal(
+            ripley.k(pattern, support=k_support)[1],
+            ripley.k(pattern, support=k_support, distances=D)[1],
+        )
+
 
 def test_prepare():
     tmp_bbox = ripley._prepare_hull(points, "bbox")
@@ -111,18 +279,28 @@ def test_prepare():
 
     tmp_ashape = ripley._prepare_hull(points, "α")
     assert tmp_ashape.equals(ashape)
+    # alpha shapes are cached on the contents of the coordinates
+    assert ripley._prepare_hull(points.copy(), "alpha") is tmp_ashape
 
     tmp_ashape = ripley._prepare_hull(points, ashape)
     assert tmp_ashape is ashape  # pass-through with no modification
 
     tmp_ashape = ripley._prepare_hull(points, pygeos_ashape)
     assert pygeos.equals(tmp_ashape, pygeos_ashape)
+    assert pygeos.is_prepared(tmp_ashape)
 
     tmp_chull = ripley._prepare_hull(points, chull)
     assert tmp_chull is chull  # pass-through with no modification
 
     tmp_chull = ripley._prepare_hull(points, "convex")
     numpy.testing.assert_allclose(tmp_chull.equations, chull.equations)
+    assert ripley._prepare_hull(points.copy(), "convex") is tmp_chull
+    assert ripley._prepare_hull(points[:-1], "convex") is not tmp_chull
+    # the cache does not hold on to the caller's coordinates
+    assert not numpy.shares_memory(tmp_chull.points, points)
+    uncached = ripley._prepare_hull(points, "convex", cache=False)
+    assert uncached is not tmp_chull
+    numpy.testing.assert_allclose(uncached.equations, chull.equations)
 
     # --------------------------------------------------------------------------
     # Now, check the prepare generally
@@ -237,6 +415,15 @@ def test_f():
     )
     assert f_test.simulations.shape == (99, 15)
 
+    # single precision coordinates work, too
+    single = points.astype(numpy.float32)
+    numpy.random.seed(2478879)
+    _, f_single = ripley.f(single, support=support)
+    numpy.random.seed(2478879)
+    _, f_double = ripley.f(points, support=support)
+    numpy.testing.assert_allclose(f_single, f_double)
+    ripley.f_test(single, support=support, n_simulations=3)
+
 
 def test_g():
     # -------------------------------------------------------------------------#
@@ -285,6 +472,11 @@ def test_j():
 
     numpy.testing.assert_allclose(j_test.statistic, manual_j[:4], atol=0.1, rtol=0.05)
 
+    # single precision coordinates work, too
+    single = points.astype(numpy.float32)
+    ripley.j(single, support=support)
+    ripley.j_test(single, support=support, n_simulations=3)
+
 
 def test_k():
     # -------------------------------------------------------------------------#
@@ -30,6 +30,7 @@ def setup_package():
     _groups_files = {
         'base': 'requirements.txt', #basic requirements
         'tests': 'requirements_tests.txt', #requirements for tests
+        'fast': 'requirements_fast.txt', #optional compiled kernels & faster trees
         'docs': 'requirements_docs.txt' #requirements for building docs
     }
     reqs = _get_requirements_from_files(_groups_files)